@@ -0,0 +1,105 @@
+# _tool_worker.py
+"""
+Persistent Bandit / Pylint worker, started by security_analyzer as
+``python -m src.tools._tool_worker <tool>``. It imports the tool once, then
+reads one JSON list of file paths per stdin line and answers each with one
+``[ok, payload]`` JSON line on stdout.
+
+Running as its own entry point (rather than a multiprocessing child) keeps
+the caller's script from being re-imported in the worker.
+"""
+import os
+import sys
+import json
+import functools
+import threading
+from typing import Dict, List
+
+
+# Pylint's Run mutates process-wide state (sys.path, astroid caches)
+_PYLINT_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _bandit_config():
+    """Load Bandit's default configuration once and share it across runs"""
+    from bandit.core import config as b_config
+    return b_config.BanditConfig()
+
+
+def _bandit_scan(file_paths: List[str]) -> List[Dict]:
+    """Run Bandit in-process and return its results as plain dicts"""
+    from bandit.core import manager as b_manager
+    
+    if not file_paths:
+        return []
+    
+    mgr = b_manager.BanditManager(_bandit_config(), 'file')
+    mgr.discover_files(file_paths)
+    mgr.run_tests()
+    return [issue.as_dict(with_code=False) for issue in mgr.get_issue_list()]
+
+
+def _pylint_scan(file_paths: List[str]) -> List[Dict]:
+    """Run Pylint in-process and return its messages as JSON-style dicts"""
+    import astroid
+    from pylint.lint import Run
+    from pylint.reporters import CollectingReporter
+    
+    if not file_paths:
+        return []
+    
+    # Collect messages as Pylint emits them instead of serializing a whole
+    # JSON report into a buffer and parsing it back
+    reporter = CollectingReporter()
+    with _PYLINT_LOCK:
+        # Temp files are reused across batches under the same module names,
+        # so drop astroid's parsed modules from the previous run
+        astroid.MANAGER.clear_cache()
+        Run(list(file_paths), reporter=reporter, exit=False)
+    
+    return [{
+        "type": message.category,
+        "path": message.abspath,
+        "line": message.line,
+        "symbol": message.symbol,
+        "message": message.msg
+    } for message in reporter.messages]
+
+
+SCANNERS = {'bandit': _bandit_scan, 'pylint': _pylint_scan}
+
+
+def main(tool: str) -> None:
+    """Worker loop: import the tool once, then serve scan requests until stdin closes"""
+    # The tools print to stdout; keep the real stdout for replies and send
+    # everything else to stderr
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    
+    def reply(ok: bool, payload) -> None:
+        replies.write(json.dumps([ok, payload], default=str) + "\n")
+        replies.flush()
+    
+    scan = SCANNERS[tool]
+    try:
+        scan([])  # Import the tool before the first real request arrives
+        import_error = None
+    except ImportError as e:
+        # Tool not installed: answer every request with the error instead of dying
+        import_error = str(e)
+    
+    for line in sys.stdin:
+        if import_error is not None:
+            reply(False, import_error)
+            continue
+        try:
+            reply(True, scan(json.loads(line)))
+        except (Exception, SystemExit) as e:
+            # Pylint calls sys.exit() on fatal errors; keep the worker alive
+            reply(False, str(e))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
@@ -24,6 +24,38 @@ class CodeStandardsChecker:
             ".h": "cpp",
             ".hpp": "cpp",
         }
+        
+        self.suffix_map = {
+            "python": ".py",
+            "java": ".java", 
+            "javascript": ".js",
+            "cpp": ".cpp",
+            "unknown": ".txt",
+        }
+        
+        # Language -> (tool name, runner) pairs, run in order; anything else gets Semgrep
+        self.language_tools = {
+            "python": [
+                ("Pylint", self.run_python_pylint),
+                ("Flake8", self.run_python_flake8),
+                ("Ruff", self.run_python_ruff),
+                ("Bandit", self.run_python_bandit),
+                ("MyPy", self.run_python_mypy),
+            ],
+            "java": [
+                ("Checkstyle", self.run_java_checkstyle),
+                ("PMD", self.run_java_pmd),
+            ],
+            "javascript": [
+                ("ESLint", self.run_javascript_eslint),
+                ("Prettier", self.run_javascript_prettier),
+            ],
+            "cpp": [
+                ("clang-tidy", self.run_cpp_clang_tidy),
+                ("cppcheck", self.run_cpp_cppcheck),
+            ],
+        }
+        self.default_tools = [("Semgrep", self.run_semgrep)]
 
     def detect_encoding(self, file_path: str) -> str:
         """Detect file encoding using chardet"""
@@ -207,78 +239,17 @@ class CodeStandardsChecker:
             })
             return report
 
-        suffix_map = {
-            "python": ".py",
-            "java": ".java", 
-            "javascript": ".js",
-            "cpp": ".cpp",
-            "unknown": ".txt",
-        }
-        
-        suffix = suffix_map.get(lang, ".txt")
+        suffix = self.suffix_map.get(lang, ".txt")
         tmp_path = None
         
         try:
             tmp_path = self.create_temp_file(code, suffix)
             temp_dir = os.path.dirname(tmp_path)
 
-            if lang == "python":
-                # ENHANCED: Added Pylint and Flake8 to Python analysis
-                report["analysis"].append({
-                    "tool": "Pylint", 
-                    "result": self.run_python_pylint(tmp_path, temp_dir)
-                })
-                report["analysis"].append({
-                    "tool": "Flake8", 
-                    "result": self.run_python_flake8(tmp_path, temp_dir)
-                })
-                report["analysis"].append({
-                    "tool": "Ruff", 
-                    "result": self.run_python_ruff(tmp_path, temp_dir)
-                })
-                report["analysis"].append({
-                    "tool": "Bandit", 
-                    "result": self.run_python_bandit(tmp_path, temp_dir)
-                })
-                report["analysis"].append({
-                    "tool": "MyPy", 
-                    "result": self.run_python_mypy(tmp_path, temp_dir)
-                })
-
-            elif lang == "java":
-                report["analysis"].append({
-                    "tool": "Checkstyle", 
-                    "result": self.run_java_checkstyle(tmp_path, temp_dir)
-                })
-                report["analysis"].append({
-                    "tool": "PMD", 
-                    "result": self.run_java_pmd(tmp_path, temp_dir)
-                })
-
-            elif lang == "javascript":
-                report["analysis"].append({
-                    "tool": "ESLint", 
-                    "result": self.run_javascript_eslint(tmp_path, temp_dir)
-                })
-                report["analysis"].append({
-                    "tool": "Prettier", 
-                    "result": self.run_javascript_prettier(tmp_path, temp_dir)
-                })
-
-            elif lang == "cpp":
-                report["analysis"].append({
-                    "tool": "clang-tidy", 
-                    "result": self.run_cpp_clang_tidy(tmp_path, temp_dir)
-                })
-                report["analysis"].append({
-                    "tool": "cppcheck", 
-                    "result": self.run_cpp_cppcheck(tmp_path, temp_dir)
-                })
-
-            else:
+            for tool_name, runner in self.language_tools.get(lang, self.default_tools):
                 report["analysis"].append({
-                    "tool": "Semgrep", 
-                    "result": self.run_semgrep(tmp_path, temp_dir)
+                    "tool": tool_name, 
+                    "result": runner(tmp_path, temp_dir)
                 })
 
         except Exception as e:
@@ -1,10 +1,19 @@
 # consolidated_reporter.py
 import os
 import json
+from collections import Counter
 from datetime import datetime
 from typing import Dict, List, Any
 from langchain.agents import Tool
 
+# Requirement categories scored by the requirement validator
+_REQUIREMENT_CATEGORIES = (
+    "user_stories",
+    "functional_requirements",
+    "security_requirements",
+    "non_functional_requirements",
+)
+
 class ConsolidatedReporter:
     """
     Generates comprehensive HTML reports from all analysis tools.
@@ -134,42 +143,13 @@ class ConsolidatedReporter:
         alignment_scores = comprehensive_analysis.get("overall_alignment_scores", {})
         alignment_analysis = requirement_data.get("alignment_analysis", {})
         
-        # Calculate overall metrics from the new structure
-        user_stories = alignment_scores.get("user_stories", {})
-        functional_reqs = alignment_scores.get("functional_requirements", {})
-        security_reqs = alignment_scores.get("security_requirements", {})
-        non_functional_reqs = alignment_scores.get("non_functional_requirements", {})
-        
-        # Calculate totals
-        total_requirements = (
-            user_stories.get("total", 0) + 
-            functional_reqs.get("total", 0) + 
-            security_reqs.get("total", 0) +
-            non_functional_reqs.get("total", 0)
-        )
-        
-        total_implemented = (
-            user_stories.get("implemented", 0) + 
-            functional_reqs.get("implemented", 0) + 
-            security_reqs.get("implemented", 0) +
-            non_functional_reqs.get("implemented", 0)
-        )
-        
-        # Calculate overall alignment score (weighted average)
-        if total_requirements > 0:
-            user_stories_weight = user_stories.get("total", 0) / total_requirements
-            functional_weight = functional_reqs.get("total", 0) / total_requirements
-            security_weight = security_reqs.get("total", 0) / total_requirements
-            non_functional_weight = non_functional_reqs.get("total", 0) / total_requirements
-            
-            overall_score = (
-                user_stories.get("average_confidence_score", 0) * user_stories_weight +
-                functional_reqs.get("average_confidence_score", 0) * functional_weight +
-                security_reqs.get("average_confidence_score", 0) * security_weight +
-                non_functional_reqs.get("average_confidence_score", 0) * non_functional_weight
-            )
-        else:
-            overall_score = 0
+        # Calculate totals and the overall alignment score in one pass
+        totals = self._sum_alignment_scores(alignment_scores)
+        total_requirements = totals["total"]
+        total_implemented = totals["implemented"]
+        
+        # Overall alignment score: confidence averaged with each category weighted by its size
+        overall_score = totals["weighted_confidence"] / total_requirements if total_requirements > 0 else 0
         
         return {
             "available": True,
@@ -179,9 +159,24 @@ class ConsolidatedReporter:
             "overall_score": overall_score,
             "total_requirements": total_requirements,
             "total_implemented": total_implemented,
+            "total_not_implemented": totals["not_implemented"],
             "coverage_percentage": (total_implemented / total_requirements * 100) if total_requirements > 0 else 0
         }
     
+    def _sum_alignment_scores(self, alignment_scores: Dict) -> Counter:
+        """Sum requirement counts and size-weighted confidence across categories"""
+        totals = Counter()
+        for category in _REQUIREMENT_CATEGORIES:
+            scores = alignment_scores.get(category, {})
+            total = scores.get("total", 0)
+            totals.update({
+                "total": total,
+                "implemented": scores.get("implemented", 0),
+                "not_implemented": scores.get("not_implemented", 0),
+                "weighted_confidence": scores.get("average_confidence_score", 0) * total
+            })
+        return totals
+    
     def _extract_deep_eval_data(self, deep_eval_data: Any) -> Dict:
         """Extract deep evaluation data"""
         if not deep_eval_data:
@@ -606,33 +601,10 @@ class ConsolidatedReporter:
         comprehensive_analysis = requirements_data.get("comprehensive_analysis", {})
         alignment_scores = comprehensive_analysis.get("overall_alignment_scores", {})
         
-        # Calculate overall metrics
-        user_stories = alignment_scores.get("user_stories", {})
-        functional_reqs = alignment_scores.get("functional_requirements", {})
-        security_reqs = alignment_scores.get("security_requirements", {})
-        non_functional_reqs = alignment_scores.get("non_functional_requirements", {})
-        
-        # Calculate totals
-        total_requirements = (
-            user_stories.get("total", 0) + 
-            functional_reqs.get("total", 0) + 
-            security_reqs.get("total", 0) +
-            non_functional_reqs.get("total", 0)
-        )
-        
-        total_implemented = (
-            user_stories.get("implemented", 0) + 
-            functional_reqs.get("implemented", 0) + 
-            security_reqs.get("implemented", 0) +
-            non_functional_reqs.get("implemented", 0)
-        )
-        
-        total_not_implemented = (
-            user_stories.get("not_implemented", 0) + 
-            functional_reqs.get("not_implemented", 0) + 
-            security_reqs.get("not_implemented", 0) +
-            non_functional_reqs.get("not_implemented", 0)
-        )
+        # Totals were summed once in _extract_requirements_data
+        total_requirements = requirements_data.get("total_requirements", 0)
+        total_implemented = requirements_data.get("total_implemented", 0)
+        total_not_implemented = requirements_data.get("total_not_implemented", 0)
         
         # Get overall score from the extracted data
         overall_score = requirements_data.get("overall_score", 0)
@@ -642,54 +614,62 @@ class ConsolidatedReporter:
         not_implemented_pct = (total_not_implemented / total_requirements * 100) if total_requirements > 0 else 0
         
         # Generate category cards
-        category_cards = ""
+        cards = []
         for category_name, category_data in alignment_scores.items():
             if isinstance(category_data, dict) and category_data.get("total", 0) > 0:
                 implemented = category_data.get("implemented", 0)
                 not_implemented = category_data.get("not_implemented", 0)
                 confidence = category_data.get("average_confidence_score", 0)
                 
-                category_cards += f"""
+                cards.append(f"""
                 <div class="metric-card">
                     <div class="metric-value score-{'excellent' if confidence >= 80 else 'good' if confidence >= 60 else 'fair' if confidence >= 40 else 'poor'}">{confidence:.1f}%</div>
                     <div class="metric-label">{category_name.replace('_', ' ').title()}</div>
                     <div class="metric-subtext">{implemented}/{category_data['total']} implemented</div>
                 </div>
-                """
+                """)
+        
+        category_cards = "".join(cards)
         
         # Generate risk assessment
         risks = comprehensive_analysis.get("risks", {})
-        risk_html = ""
+        risk_items = []
         for risk_type, risk_desc in risks.items():
             if isinstance(risk_desc, str):
                 risk_level = "error" if "critical" in risk_desc.lower() or "high" in risk_desc.lower() else "warning"
-                risk_html += f"""
+                risk_items.append(f"""
                 <div class="requirement-item requirement-{risk_level}">
                     <strong>{risk_type.replace('_', ' ').title()}:</strong> {risk_desc}
                 </div>
-                """
+                """)
+        
+        risk_html = "".join(risk_items)
         
         # Generate recommendations
         recommendations = comprehensive_analysis.get("recommendations", {})
-        rec_html = ""
+        rec_items = []
         for rec_type, rec_desc in recommendations.items():
             if isinstance(rec_desc, str):
-                rec_html += f"""
+                rec_items.append(f"""
                 <div class="requirement-item">
                     <strong>{rec_type.replace('_', ' ').title()}:</strong> {rec_desc}
                 </div>
-                """
+                """)
+        
+        rec_html = "".join(rec_items)
         
         # Generate improvement plans
         improvement_plans = comprehensive_analysis.get("actionable_improvement_plans", {})
-        plan_html = ""
+        plan_items = []
         for plan_type, plan_desc in improvement_plans.items():
             if isinstance(plan_desc, str):
-                plan_html += f"""
+                plan_items.append(f"""
                 <div class="requirement-item">
                     <strong>{plan_type.replace('_', ' ').title()}:</strong> {plan_desc}
                 </div>
-                """
+                """)
+        
+        plan_html = "".join(plan_items)
         
         # Executive summary
         exec_summary = comprehensive_analysis.get("executive_summary", "No executive summary available.")
@@ -803,7 +783,7 @@ class ConsolidatedReporter:
         
         for category, requirements in requirement_details.items():
             if requirements and isinstance(requirements, list):
-                category_html = f"""
+                category_parts = [f"""
                 <div class="expandable-section">
                     <div class="expandable-header">
                         <div class="expandable-title">
@@ -815,7 +795,7 @@ class ConsolidatedReporter:
                     <div class="expandable-content">
                         <div class="tool-results">
                             <h4>{category.replace('_', ' ').title()} Analysis</h4>
-                """
+                """]
                 
                 for req in requirements:
                     if isinstance(req, dict):
@@ -833,7 +813,7 @@ class ConsolidatedReporter:
                         elif "Partially" in status:
                             status_class = "requirement-item requirement-partial"
                         
-                        category_html += f"""
+                        category_parts.append(f"""
                         <div class="{status_class}">
                             <strong>{req_id}: {description}</strong><br>
                             <strong>Status:</strong> {status} | <strong>Confidence:</strong> {confidence}%<br>
@@ -841,14 +821,14 @@ class ConsolidatedReporter:
                             <strong>Code Evidence:</strong> {code_evidence}<br>
                             <strong>Gaps:</strong> {gaps}
                         </div>
-                        """
+                        """)
                 
-                category_html += """
+                category_parts.append("""
                         </div>
                     </div>
                 </div>
-                """
-                html_sections.append(category_html)
+                """)
+                html_sections.append("".join(category_parts))
         
         return "\n".join(html_sections)
     def _generate_standards_section(self, standards_data: Dict) -> str:
@@ -867,12 +847,12 @@ class ConsolidatedReporter:
         # Generate file issues list
         file_issues_html = ""
         if files:
-            file_issues_html = "<div class='file-list'><h4>File Analysis:</h4>"
+            file_items = ["<div class='file-list'><h4>File Analysis:</h4>"]
             for file_data in files:
                 file_name = file_data.get("file_name", "Unknown")
                 file_issues = file_data.get("issue_count", 0)
                 
-                file_issues_html += f"""
+                file_items.append(f"""
                 <div class="file-item">
                     <div class="file-name">
                         <i class="fas fa-file-code"></i>
@@ -882,35 +862,38 @@ class ConsolidatedReporter:
                         <span class="status-badge status-{'error' if file_issues > 5 else 'warning' if file_issues > 2 else 'info'}">{file_issues} issues</span>
                     </div>
                 </div>
-                """
-            file_issues_html += "</div>"
+                """)
+            file_items.append("</div>")
+            file_issues_html = "".join(file_items)
         
         # Generate detailed tool results for each file
-        detailed_analysis_html = ""
+        detail_items = []
         for file_data in files:
             file_name = file_data.get("file_name", "Unknown")
             tool_results = file_data.get("tool_results", [])
             
-            file_tools_html = ""
+            tool_items = []
             for tool_result in tool_results:
                 tool_name = tool_result.get("tool", "Unknown")
                 result = tool_result.get("result", "")
                 
                 if result and "No issues" not in result and "No output" not in result:
-                    file_tools_html += f"""
+                    tool_items.append(f"""
                     <div class="tool-result">
                         <div class="tool-name">{tool_name}</div>
                         <div class="tool-output">{result}</div>
                     </div>
-                    """
+                    """)
             
-            if file_tools_html:
-                detailed_analysis_html += f"""
+            if tool_items:
+                detail_items.append(f"""
                 <div style="margin-bottom: 2rem;">
                     <h4>{file_name}</h4>
-                    {file_tools_html}
+                    {''.join(tool_items)}
                 </div>
-                """
+                """)
+        
+        detailed_analysis_html = "".join(detail_items)
         
         if total_issues == 0:
             return f'''
@@ -961,25 +944,25 @@ class ConsolidatedReporter:
         summary = deep_eval_data.get("summary", "")
         
         # Generate file evaluations
-        file_eval_html = ""
+        eval_items = []
         for file_eval in file_evaluations:
             file_name = file_eval.get("file_name", "Unknown")
             file_score = file_eval.get("overall_score", 0)
             metrics = file_eval.get("metrics", {})
             
-            metrics_html = ""
+            metric_items = []
             for metric_name, metric_data in metrics.items():
                 score = metric_data.get("score", 0)
                 reasoning = metric_data.get("reasoning", "")
                 
-                metrics_html += f"""
+                metric_items.append(f"""
                 <div style="margin-bottom: 1rem;">
                     <strong>{metric_name.replace('_', ' ').title()}:</strong> {score}/5.0
                     <br><small>{reasoning[:200]}{'...' if len(reasoning) > 200 else ''}</small>
                 </div>
-                """
+                """)
             
-            file_eval_html += f"""
+            eval_items.append(f"""
             <div class="file-item">
                 <div class="file-name">
                     <i class="fas fa-file-code"></i>
@@ -990,9 +973,11 @@ class ConsolidatedReporter:
                 </div>
             </div>
             <div style="padding: 1rem; background: #f8fafc; border-radius: 6px; margin-bottom: 1rem;">
-                {metrics_html}
+                {''.join(metric_items)}
             </div>
-            """
+            """)
+        
+        file_eval_html = "".join(eval_items)
         
         return f"""
         <div class="section">
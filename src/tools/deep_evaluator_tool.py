@@ -1,14 +1,26 @@
 # deep_evaluator.py
+import asyncio
+import hashlib
 from typing import Dict, List, Any
 from deepeval.metrics import GEval
 from deepeval.test_case import LLMTestCase, LLMTestCaseParams
+from src.utils.result_cache import ResultCache
+from src.utils.async_bridge import run_sync
 import json
 
+# Upper bound on concurrent GEval judge calls, to stay within API rate limits
+_MAX_CONCURRENT_EVALS = 8
+
+
 class DeepEvaluator:
     """
     DeepEval integration using requirement alignment metric for code evaluation.
     """
     
+    # Persistent per-file evaluations, keyed by judge model, metric, requirements
+    # and file content, so re-runs only send changed files to the judge
+    _cache = ResultCache("deep_evaluator")
+    
     def __init__(self):
         self.metric = GEval(
             name="Requirement Alignment",
@@ -36,11 +48,8 @@ class DeepEvaluator:
                 }
                 return state
             
-            # Evaluate each file
-            file_evaluations = []
-            for file in files:
-                file_eval = self._evaluate_single_file(file, requirements)
-                file_evaluations.append(file_eval)
+            # Evaluate all files concurrently; results keep the input order
+            file_evaluations = self._run_evaluations(files, requirements)
             
             # Generate overall results
             state["deep_evaluation"] = {
@@ -60,12 +69,38 @@ class DeepEvaluator:
         
         return state
     
-    def _evaluate_single_file(self, file: Dict, requirements: Dict) -> Dict:
+    def _run_evaluations(self, files: List[Dict], requirements: Dict) -> List[Dict]:
+        """Run the async evaluations from sync code - sync wrapper for async method"""
+        return run_sync(self._evaluate_all(files, requirements))
+    
+    async def _evaluate_all(self, files: List[Dict], requirements: Dict) -> List[Dict]:
+        """Evaluate every file with a bounded number of judge calls in flight"""
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_EVALS)
+        
+        async def evaluate(file: Dict) -> Dict:
+            async with semaphore:
+                return await self._evaluate_single_file(file, requirements)
+        
+        return await asyncio.gather(*(evaluate(file) for file in files))
+    
+    async def _evaluate_single_file(self, file: Dict, requirements: Dict) -> Dict:
         """Evaluate a single file using requirement alignment metric"""
         file_name = file.get("file_name", "unknown")
         code_content = file.get("code", "")
         language = file.get("language", "unknown")
         
+        cache_key = hashlib.blake2b(
+            "\0".join((
+                self.metric.evaluation_model, self.metric.criteria, str(self.metric.threshold),
+                json.dumps(requirements, sort_keys=True, default=str),
+                file_name, language, code_content
+            )).encode('utf-8'),
+            digest_size=16
+        ).hexdigest()
+        cached = self._cache.load(cache_key)
+        if cached is not None:
+            return cached
+        
         # Create test case for the file
         test_case = LLMTestCase(
             input=f"Evaluate code file: {file_name}",
@@ -81,11 +116,12 @@ class DeepEvaluator:
                 name="Requirement Alignment",
                 criteria=self.metric.criteria,
                 evaluation_params=self.metric.evaluation_params,
-                threshold=self.metric.threshold
+                threshold=self.metric.threshold,
+                model=self.metric.model
             )
             
             # Measure the metric
-            metric.measure(test_case)
+            await metric.a_measure(test_case)
             
             metric_result = {
                 "score": metric.score,
@@ -99,14 +135,19 @@ class DeepEvaluator:
                 "reasoning": f"Evaluation failed: {str(e)}",
                 "passed": False
             }
+            cache_key = None  # Retry failed evaluations on the next run
         
-        return {
+        evaluation = {
             "file_name": file_name,
             "language": language,
             "metric": metric_result,
             "overall_score": metric_result["score"],
             "passed": metric_result["passed"]
         }
+        
+        if cache_key is not None:
+            self._cache.store(cache_key, evaluation)
+        return evaluation
     
     def _create_expected_output(self, requirements: Dict, language: str) -> str:
         """Create expected output description based on requirements"""
@@ -140,7 +181,7 @@ class DeepEvaluator:
         passed_files = sum(1 for file_eval in file_evaluations if file_eval.get("passed", False))
         total_files = len(file_evaluations)
         
-        summary = f"""
+        parts = [f"""
 📊 DeepEval Requirement Alignment Summary
 ────────────────────────────────────────
 
@@ -149,15 +190,15 @@ Files Passed: {passed_files}/{total_files}
 Threshold: {self.metric.threshold}
 
 File Scores:
-"""
+"""]
         
         for file_eval in file_evaluations:
             file_name = file_eval["file_name"]
             score = file_eval["overall_score"]
             status = "✅" if file_eval["passed"] else "❌"
-            summary += f"  {file_name}: {score:.2f} {status}\n"
+            parts.append(f"  {file_name}: {score:.2f} {status}\n")
         
-        return summary
+        return "".join(parts)
     
     def _generate_recommendations(self, file_evaluations: List[Dict]) -> List[str]:
         """Generate actionable recommendations"""
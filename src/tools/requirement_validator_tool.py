@@ -1,61 +1,211 @@
 # requirement_validator.py
-import os
+import re
 import json
 import time
-import re
 import asyncio
-from typing import Dict, List, Any
+import hashlib
+import functools
+from typing import Dict, List
 from langchain.agents import Tool
 from langchain.schema import HumanMessage, SystemMessage
 from src.utils.langchain_openai import OpenAILLM
+from src.utils.json_utils import json_loads
+from src.utils.result_cache import ResultCache
+from src.utils.async_bridge import run_sync
 from datetime import datetime
 
+# Prompt payloads are serialized compactly: indentation and escaped non-ASCII
+# characters only cost input tokens
+_COMPACT_JSON = {"separators": (",", ":"), "ensure_ascii": False}
+
+# Fenced blocks in an LLM reply: a ```json block wins over any earlier
+# snippet, and an untagged fence is the fallback
+_JSON_FENCE_RE = re.compile(r"```json\s*(.*?)\s*```", re.DOTALL)
+_FENCE_RE = re.compile(r"```\s*(.*?)\s*```", re.DOTALL)
+
+# Tokens of code the JSON prompt may carry in total; when files exceed it, the
+# largest files are truncated to an equal share instead of a fixed character count
+_CODE_TOKEN_BUDGET = 50_000
+_CHARS_PER_TOKEN = 4  # Estimate used when tiktoken is unavailable
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding():
+    """Return the gpt-4o tokenizer, or None when tiktoken is unavailable"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+def _allocate_token_budget(sizes: List[int], budget: int) -> List[int]:
+    """Split a token budget across files: small files stay whole, large ones share the rest"""
+    shares = [0] * len(sizes)
+    remaining = budget
+    files_left = len(sizes)
+    for index in sorted(range(len(sizes)), key=sizes.__getitem__):
+        shares[index] = min(sizes[index], remaining // files_left)
+        remaining -= shares[index]
+        files_left -= 1
+    return shares
+
 class RequirementValidator:
     """
     Validates code implementation against requirements with async streaming output.
     Provides separate JSON creation and beautified streaming.
     """
+
+    # Built once at import and shared by both calls, so they send an identical
+    # prompt prefix. Each human message then starts with its static format
+    # instructions and ends with the per-run requirements and code, so OpenAI's
+    # prompt cache can reuse everything up to the inputs across runs.
+    _SYSTEM_MSG = SystemMessage(content="""You are an expert software requirements analyst. 
+                Assess how well the code implements the given requirements.
+                Be precise and evidence-based. Only report what you can verify in the code.""")
+
+    _JSON_INSTRUCTIONS = """
+        Create a comprehensive JSON analysis of requirement implementation with specific code references.
+        Your output MUST follow the exact JSON format provided.
+
+        OUTPUT FORMAT (STRICT JSON) ***DON'T CHANGE ANY KEYS***:
+        {
+            "comprehensive_analysis": {
+                "overall_alignment_scores": {
+                    "user_stories": {
+                        "total": 0,
+                        "implemented": 0,
+                        "not_implemented": 0,
+                        "average_confidence_score": 0.0
+                    },
+                    "functional_requirements": {
+                        "total": 0,
+                        "implemented": 0,
+                        "not_implemented": 0,
+                        "average_confidence_score": 0.0
+                    },
+                    "security_requirements": {
+                        "total": 0,
+                        "implemented": 0,
+                        "not_implemented": 0,
+                        "average_confidence_score": 0.0
+                    },
+                    "non_functional_requirements": {
+                        "total": 0,
+                        "implemented": 0,
+                        "not_implemented": 0,
+                        "average_confidence_score": 0.0
+                    }
+                },
+                "requirement_details": {
+                    "user_stories": [
+                        {
+                            "id": "US-1",
+                            "description": "User story description",
+                            "status": "Fully Implemented",
+                            "confidence_score": 95.0,
+                            "implemented_files": ["file1.py", "file2.py"],
+                            "code_evidence": "Specific functions and line numbers",
+                            "gaps": "None or specific gaps"
+                        }
+                    ],
+                    "functional_requirements": [],
+                    "security_requirements": [],
+                    "non_functional_requirements": []
+                },
+                "file_analysis": {
+                    "file1.py": {
+                        "requirements_covered": ["US-1", "FR-1"],
+                        "coverage_percentage": 85.0,
+                        "implementation_quality": "Good",
+                        "issues_found": []
+                    }
+                },
+                "executive_summary": "High-level summary of findings and critical gaps",
+                "actionable_improvement_plans": {
+                    "short_term": "Immediate actions (1-2 weeks)",
+                    "medium_term": "Next phase actions (3-4 weeks)", 
+                    "long_term": "Strategic improvements (1-2 months)"
+                }
+            },
+            "alignment_analysis": {
+                "overall_alignment_score": 0.85,
+                "coverage_metrics": {
+                    "total_requirements": 15,
+                    "fully_covered": 8,
+                    "partially_covered": 4,
+                    "missing": 3,
+                    "coverage_percentage": 80.0
+                }
+            }
+        }
+"""
+
+    _BEAUTIFIED_INSTRUCTIONS = """
+        Provide a beautiful, human-readable, step-by-step analysis of how well the code implements the requirements.
+        Use clear, engaging language with emojis and bullet points.
+
+        ANALYSIS FORMAT:
+        🎯 EXECUTIVE OVERVIEW
+        - Overall implementation status
+        - Key successes and gaps
+
+        📊 REQUIREMENT BREAKDOWN
+        - User Stories: ✅/❌ status with confidence
+        - Functional Requirements: ✅/❌ status  
+        - Security Requirements: ✅/❌ status
+        - Non-Functional Requirements: ✅/❌ status
+
+        🔍 KEY FINDINGS
+        - What's working well
+        - Critical gaps identified
+        - Code quality observations
+
+        💡 RECOMMENDATIONS
+        - Immediate actions needed
+        - Strategic improvements
+
+        Use engaging language, emojis, and make it easy to understand.
+        Focus on telling the story of the implementation journey.
+"""
+
+    # Pins each prompt shape to the same cache routing key. Sent through extra_body
+    # so openai SDKs older than the prompt_cache_key parameter still accept it.
+    _JSON_EXTRA_BODY = {"prompt_cache_key": "requirement_validator.json"}
+    _BEAUTIFIED_EXTRA_BODY = {"prompt_cache_key": "requirement_validator.beautified"}
+    
+    # LLM responses for identical inputs, shared across instances: CI re-runs and
+    # save loops validate the same requirements and code back to back
+    _response_cache = ResultCache()
     
     def __init__(self):
-        # Use streaming LLM for real-time output
-        self.llm = OpenAILLM().get_streaming_llm()
-        self.non_streaming_llm = OpenAILLM().get_non_streaming_llm()
+        # One shared client for both calls: ainvoke for JSON, astream for the
+        # beautified output. No stdout callback, since the streaming loop prints
+        # the tokens itself.
+        self._openai = OpenAILLM(streaming=False)
+    
+    @property
+    def llm(self):
+        """ChatOpenAI bound to the running event loop's connection pool"""
+        return self._openai.get_llm()
     
     def validate_requirements(self, state: Dict) -> Dict:
         """Validate code implementation - sync wrapper for async method"""
         print("🔍 Starting comprehensive requirements validation...\n")
+        ts = datetime.now().isoformat(timespec='seconds')
         
         try:
-            # Check if we're in an event loop
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    # If event loop is running, use thread-based approach
-                    import concurrent.futures
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        future = executor.submit(self._run_async_in_thread, state)
-                        return future.result()
-                else:
-                    # If no running event loop, use asyncio.run()
-                    return asyncio.run(self._async_validate_requirements(state))
-            except RuntimeError:
-                # No event loop, use asyncio.run()
-                return asyncio.run(self._async_validate_requirements(state))
+            return run_sync(self._async_validate_requirements(state))
                 
         except Exception as e:
             error_msg = f"Requirement validation failed: {str(e)}"
             print(f"❌ {error_msg}")
             return {
                 "error": error_msg,
-                "timestamp": str(datetime.now())
+                "timestamp": ts
             }
     
-    def _run_async_in_thread(self, state: Dict) -> Dict:
-        """Run async function in a separate thread"""
-        return asyncio.run(self._async_validate_requirements(state))
-    
     async def _async_validate_requirements(self, state: Dict) -> Dict:
         """Async implementation of requirement validation"""
+        ts = datetime.now().isoformat(timespec='seconds')
         try:
             # Extract requirements and code from state
             requirements = state.get("requirements", {})
@@ -66,14 +216,14 @@ class RequirementValidator:
                 return {
                     "skipped": True,
                     "reason": "No requirements provided for validation",
-                    "timestamp": str(datetime.now())
+                    "timestamp": ts
                 }
             
             if not files:
                 print("❌ No code files available for analysis")
                 return {
                     "error": "No code files available for requirement validation",
-                    "timestamp": str(datetime.now())
+                    "timestamp": ts
                 }
             
             print(f"📋 Found {len(requirements)} requirements and {len(files)} code files\n")
@@ -82,7 +232,7 @@ class RequirementValidator:
             analysis_result = await self._async_streaming_analysis(requirements, files)
             
             # Add metadata
-            analysis_result["timestamp"] = str(datetime.now())
+            analysis_result["timestamp"] = ts
             analysis_result["files_analyzed"] = len(files)
             analysis_result["requirements_analyzed"] = len(requirements)
             
@@ -94,7 +244,7 @@ class RequirementValidator:
             print(f"❌ {error_msg}")
             return {
                 "error": error_msg,
-                "timestamp": str(datetime.now())
+                "timestamp": ts
             }
     
     async def _async_streaming_analysis(self, requirements: Dict, files: List[Dict]) -> Dict:
@@ -104,33 +254,31 @@ class RequirementValidator:
         print("🔄 Performing Async Requirements Analysis")
         print("=" * 70)
         
-        # Step 1: Create structured JSON analysis (non-streaming)
-        print("\n📊 Step 1: Creating structured JSON analysis...")
-        json_analysis_task = asyncio.create_task(
-            self._create_json_analysis(requirements, files)
-        )
+        # Serialize and hash the inputs once; both prompts and cache keys reuse them
+        requirements_json = json.dumps(requirements, **_COMPACT_JSON)
+        input_hash = self._input_hash(requirements_json, files)
         
-        # Step 2: Run beautified streaming analysis concurrently
-        print("🎨 Step 2: Starting beautified streaming analysis...")
-        streaming_task = asyncio.create_task(
-            self._beautified_streaming_analysis(requirements, files)
-        )
-        
-        # Wait for both tasks to complete
-        json_result, streaming_output = await asyncio.gather(
-            json_analysis_task,
-            streaming_task,
-            return_exceptions=True
-        )
-        
-        # Handle exceptions
-        if isinstance(json_result, Exception):
-            print(f"❌ JSON analysis failed: {json_result}")
+        # The TaskGroup cancels the streaming task as soon as the JSON task fails,
+        # so we stop paying for output that would be discarded anyway
+        try:
+            async with asyncio.TaskGroup() as tg:
+                # Step 1: Create structured JSON analysis (non-streaming)
+                print("\n📊 Step 1: Creating structured JSON analysis...")
+                json_analysis_task = tg.create_task(
+                    self._create_json_analysis(requirements_json, files, input_hash)
+                )
+
+                # Step 2: Run beautified streaming analysis concurrently
+                print("🎨 Step 2: Starting beautified streaming analysis...")
+                tg.create_task(
+                    self._beautified_streaming_analysis(requirements_json, files, input_hash)
+                )
+        except ExceptionGroup as eg:
+            print(f"❌ JSON analysis failed: {eg.exceptions[0]}")
             return self._create_fallback_structure()
-        
-        if isinstance(streaming_output, Exception):
-            print(f"⚠️ Streaming analysis had issues: {streaming_output}")
-        
+
+        json_result = json_analysis_task.result()
+
         print("\n✅ Both JSON and streaming analysis completed!")
         
         # Display comprehensive summary
@@ -138,24 +286,26 @@ class RequirementValidator:
         
         return json_result
     
-    async def _create_json_analysis(self, requirements: Dict, files: List[Dict]) -> Dict:
-        """Create structured JSON analysis using non-streaming LLM"""
+    async def _create_json_analysis(self, requirements_json: str, files: List[Dict], input_hash: str) -> Dict:
+        """Create structured JSON analysis with a single non-streamed response"""
         try:
-            prompt = self._create_json_analysis_prompt(requirements, files)
+            cache_key = f"json:{input_hash}"
+            cached = self._response_cache.load(cache_key)
+            if cached is not None:
+                print("   ♻️ Reusing cached JSON analysis")
+                return cached
+            
+            prompt = self._create_json_analysis_prompt(requirements_json, files)
             
-            messages = [
-                SystemMessage(content="""You are a meticulous requirements analyst. 
-                Create a structured JSON analysis with specific code references.
-                Your output MUST follow the exact JSON format provided.
-                Be precise and evidence-based."""),
-                HumanMessage(content=prompt)
-            ]
+            messages = [self._SYSTEM_MSG, HumanMessage(content=prompt)]
             
             print("   🧠 Generating structured JSON analysis...")
-            response = await self.non_streaming_llm.ainvoke(messages)
+            response = await self.llm.ainvoke(messages, extra_body=self._JSON_EXTRA_BODY)
             
             # Parse the JSON response
             result = self._parse_json_response(response.content)
+            if not result.get("parse_error"):
+                self._response_cache.store(cache_key, result)
             print("   ✅ JSON analysis completed successfully")
             return result
             
@@ -163,202 +313,131 @@ class RequirementValidator:
             print(f"   ❌ JSON analysis failed: {e}")
             raise e
     
-    async def _beautified_streaming_analysis(self, requirements: Dict, files: List[Dict]) -> str:
+    async def _beautified_streaming_analysis(self, requirements_json: str, files: List[Dict], input_hash: str) -> str:
         """Perform beautified streaming analysis with time-based batching"""
         try:
-            prompt = self._create_beautified_prompt(requirements, files)
+            cache_key = f"beautified:{input_hash}"
+            cached = self._response_cache.load(cache_key)
             
-            messages = [
-                SystemMessage(content="""You are an expert software requirements analyst. 
-                Provide a human-readable, step-by-step analysis of how well the code implements requirements.
-                Use clear, engaging language with emojis and bullet points.
-                Focus on telling a story about the implementation status."""),
-                HumanMessage(content=prompt)
-            ]
+            prompt = self._create_beautified_prompt(requirements_json, files)
+            
+            messages = [self._SYSTEM_MSG, HumanMessage(content=prompt)]
             
             print("   " + "=" * 50)
             print()  # Add a newline for better formatting
             
-            full_response = ""
-            print_buffer = ""
-            last_print_time = time.time()
-            BATCH_INTERVAL = 1  # Print every 300ms
+            if cached is not None:
+                print(cached, end="", flush=True)
+                print("\n\n   " + "=" * 50)
+                return cached
+            
+            # Collect tokens in lists and join once, instead of re-copying strings per token
+            response_parts = []
+            print_buffer = []
+            buffered_chars = 0
+            last_print_time = time.monotonic()
+            BATCH_INTERVAL = 1  # seconds
             
-            async for chunk in self.llm.astream(messages):
-                content = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            # ChatOpenAI.astream always yields message chunks with string content
+            async for chunk in self.llm.astream(messages, extra_body=self._BEAUTIFIED_EXTRA_BODY):
+                content = chunk.content
                 
-                if content and content not in full_response:
-                    print_buffer += content
-                    full_response += content
+                if content:
+                    print_buffer.append(content)
+                    response_parts.append(content)
+                    buffered_chars += len(content)
                     
-                    current_time = time.time()
+                    current_time = time.monotonic()
                     
                     # Print if enough time has passed or buffer is getting large
-                    if (current_time - last_print_time >= BATCH_INTERVAL) or len(print_buffer) > 50:
-                        print(print_buffer, end="", flush=True)
-                        print_buffer = ""
+                    if (current_time - last_print_time >= BATCH_INTERVAL) or buffered_chars > 50:
+                        print("".join(print_buffer), end="", flush=True)
+                        print_buffer.clear()
+                        buffered_chars = 0
                         last_print_time = current_time
             
             # Print any remaining content
             if print_buffer:
-                print(print_buffer, end="", flush=True)
+                print("".join(print_buffer), end="", flush=True)
             
             print("\n\n   " + "=" * 50)
             
+            full_response = "".join(response_parts)
+            if full_response:
+                self._response_cache.store(cache_key, full_response)
             return full_response
             
         except Exception as e:
             print(f"   ⚠️ Streaming analysis interrupted: {e}")
             return ""
         
-    def _create_json_analysis_prompt(self, requirements: Dict, files: List[Dict]) -> str:
+    def _input_hash(self, requirements_json: str, files: List[Dict]) -> str:
+        """Hash the requirements and file contents for the response cache keys"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(requirements_json.encode('utf-8'))
+        for file in files:
+            digest.update(f"\0{file.get('file_name', 'unknown')}\0".encode('utf-8'))
+            digest.update(file.get('code', '').encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _create_json_analysis_prompt(self, requirements_json: str, files: List[Dict]) -> str:
         """Create prompt for structured JSON analysis"""
-        return f"""
-        Create a comprehensive JSON analysis of requirement implementation.
-
+        return self._JSON_INSTRUCTIONS + f"""
         REQUIREMENTS:
-        {json.dumps(requirements, indent=2)}
+        {requirements_json}
 
         CODE FILES:
         {self._format_files_for_json(files)}
-
-        OUTPUT FORMAT (STRICT JSON) ***DON'T CHANGE ANY KEYS***:
-        {{
-            "comprehensive_analysis": {{
-                "overall_alignment_scores": {{
-                    "user_stories": {{
-                        "total": 0,
-                        "implemented": 0,
-                        "not_implemented": 0,
-                        "average_confidence_score": 0.0
-                    }},
-                    "functional_requirements": {{
-                        "total": 0,
-                        "implemented": 0,
-                        "not_implemented": 0,
-                        "average_confidence_score": 0.0
-                    }},
-                    "security_requirements": {{
-                        "total": 0,
-                        "implemented": 0,
-                        "not_implemented": 0,
-                        "average_confidence_score": 0.0
-                    }},
-                    "non_functional_requirements": {{
-                        "total": 0,
-                        "implemented": 0,
-                        "not_implemented": 0,
-                        "average_confidence_score": 0.0
-                    }}
-                }},
-                "requirement_details": {{
-                    "user_stories": [
-                        {{
-                            "id": "US-1",
-                            "description": "User story description",
-                            "status": "Fully Implemented",
-                            "confidence_score": 95.0,
-                            "implemented_files": ["file1.py", "file2.py"],
-                            "code_evidence": "Specific functions and line numbers",
-                            "gaps": "None or specific gaps"
-                        }}
-                    ],
-                    "functional_requirements": [],
-                    "security_requirements": [],
-                    "non_functional_requirements": []
-                }},
-                "file_analysis": {{
-                    "file1.py": {{
-                        "requirements_covered": ["US-1", "FR-1"],
-                        "coverage_percentage": 85.0,
-                        "implementation_quality": "Good",
-                        "issues_found": []
-                    }}
-                }},
-                "executive_summary": "High-level summary of findings and critical gaps",
-                "actionable_improvement_plans": {{
-                    "short_term": "Immediate actions (1-2 weeks)",
-                    "medium_term": "Next phase actions (3-4 weeks)", 
-                    "long_term": "Strategic improvements (1-2 months)"
-                }}
-            }},
-            "alignment_analysis": {{
-                "overall_alignment_score": 0.85,
-                "coverage_metrics": {{
-                    "total_requirements": 15,
-                    "fully_covered": 8,
-                    "partially_covered": 4,
-                    "missing": 3,
-                    "coverage_percentage": 80.0
-                }}
-            }}
-        }}
-
-        Be precise and evidence-based. Only report what you can verify in the code.
         """
     
-    def _create_beautified_prompt(self, requirements: Dict, files: List[Dict]) -> str:
+    def _create_beautified_prompt(self, requirements_json: str, files: List[Dict]) -> str:
         """Create prompt for beautified streaming analysis"""
-        return f"""
-        Provide a beautiful, human-readable analysis of how well the code implements the requirements.
-
+        return self._BEAUTIFIED_INSTRUCTIONS + f"""
         REQUIREMENTS TO ANALYZE:
-        {json.dumps(requirements, indent=2)}
+        {requirements_json}
 
         CODE FILES:
         {len(files)} files with {sum(len(f.get('code', '')) for f in files)} total characters
-
-        ANALYSIS FORMAT:
-        🎯 EXECUTIVE OVERVIEW
-        - Overall implementation status
-        - Key successes and gaps
-
-        📊 REQUIREMENT BREAKDOWN
-        - User Stories: ✅/❌ status with confidence
-        - Functional Requirements: ✅/❌ status  
-        - Security Requirements: ✅/❌ status
-        - Non-Functional Requirements: ✅/❌ status
-
-        🔍 KEY FINDINGS
-        - What's working well
-        - Critical gaps identified
-        - Code quality observations
-
-        💡 RECOMMENDATIONS
-        - Immediate actions needed
-        - Strategic improvements
-
-        Use engaging language, emojis, and make it easy to understand.
-        Focus on telling the story of the implementation journey.
         """
     
     def _format_files_for_json(self, files: List[Dict]) -> str:
-        """Format files for JSON analysis"""
+        """Format files for JSON analysis, fitting their code into the token budget"""
+        codes = [file.get('code', '') for file in files]
+        encoding = _get_encoding()
+        if encoding is not None:
+            tokens = [encoding.encode(code, disallowed_special=()) for code in codes]
+            sizes = [len(file_tokens) for file_tokens in tokens]
+        else:
+            sizes = [-(-len(code) // _CHARS_PER_TOKEN) for code in codes]
+        
+        shares = _allocate_token_budget(sizes, _CODE_TOKEN_BUDGET)
+        
         formatted = []
-        for file in files:
+        for index, (file, code, size, share) in enumerate(zip(files, codes, sizes, shares)):
+            if share >= size:
+                preview = code
+            elif encoding is not None:
+                preview = encoding.decode(tokens[index][:share]) + "..."
+            else:
+                preview = code[:share * _CHARS_PER_TOKEN] + "..."
+            
             file_info = {
                 "file_name": file.get('file_name', 'unknown'),
                 "language": file.get('language', 'unknown'),
-                "size": len(file.get('code', '')),
-                "content_preview": file.get('code', '')[:1000] + "..." if len(file.get('code', '')) > 1000 else file.get('code', '')
+                "size": len(code),
+                "content_preview": preview
             }
             formatted.append(file_info)
-        return json.dumps(formatted, indent=2)
+        return json.dumps(formatted, **_COMPACT_JSON)
     
     def _parse_json_response(self, content: str) -> Dict:
         """Parse JSON response from LLM"""
         try:
             # Extract JSON from response
-            if "```json" in content:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                json_str = content.split("```")[1].strip()
-                if json_str.startswith("json"):
-                    json_str = json_str[4:].strip()
-            else:
-                json_str = content.strip()
+            match = _JSON_FENCE_RE.search(content) or _FENCE_RE.search(content)
+            json_str = match.group(1) if match else content.strip()
             
-            result = json.loads(json_str)
+            result = json_loads(json_str)
             return self._validate_json_structure(result)
             
         except Exception as e:
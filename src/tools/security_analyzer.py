@@ -1,23 +1,268 @@
 # security_analyzer.py
-import subprocess
+import asyncio
 import tempfile
+import shutil
 import os
-from typing import Dict, List
-from langchain.agents import Tool
+import hashlib
+import bisect
+import time
+import atexit
+import sys
 import json
+import threading
+import queue
+import subprocess
+import importlib.metadata
+import importlib.util
+from typing import Dict, List, Optional, Tuple
+from src.utils.json_utils import json_loads
+from src.utils.result_cache import ResultCache
+from src.utils.async_bridge import run_sync
+
+# Scoring tables, shared by every score computation
+_SEV_W = {
+    'critical': 5,
+    'high': 4,
+    'medium': 3,
+    'low': 1,
+    'info': 0
+}
+_SEC_TYPES = frozenset({'security', 'vulnerability'})
+_QUAL_TYPES = frozenset({'quality', 'maintainability'})
+
+# Severities that put an issue in the report's risk / quality issue lists
+_RISK_SEVERITIES = frozenset({'critical', 'high'})
+_QUAL_REPORT_SEVERITIES = frozenset({'high', 'medium'})
+
+# Rating ladders: a score at or above each threshold moves up one label
+_RATING_THRESH = (3.0, 5.0, 7.0, 9.0)
+_SEC_LABELS = ('CRITICAL', 'POOR', 'FAIR', 'GOOD', 'EXCELLENT')
+_QUAL_LABELS = ('VERY_POOR', 'POOR', 'FAIR', 'GOOD', 'EXCELLENT')
+
+# Part of the cache key; bump when issue mapping changes so cached analyses are recomputed
+_ANALYSIS_VERSION = 3
+
+# Ruff rule code or prefix -> (issue type, severity); the S rules are Bandit's
+# checks (S<nnn> is B<nnn>) and carry the severity Bandit reports for them
+_RUFF_RULE_MAP = {
+    # Bandit high: debug servers, broken ciphers and TLS, cleartext protocols,
+    # shell injection, template autoescape off
+    'S201': ('security', 'high'),
+    'S202': ('security', 'high'),
+    'S304': ('security', 'high'),
+    'S312': ('security', 'high'),
+    'S321': ('security', 'high'),
+    'S324': ('security', 'high'),
+    'S401': ('security', 'high'),
+    'S402': ('security', 'high'),
+    'S411': ('security', 'high'),
+    'S412': ('security', 'high'),
+    'S413': ('security', 'high'),
+    'S415': ('security', 'high'),
+    'S501': ('security', 'high'),
+    'S502': ('security', 'high'),
+    'S505': ('security', 'high'),
+    'S507': ('security', 'high'),
+    'S602': ('security', 'high'),
+    'S605': ('security', 'high'),
+    'S609': ('security', 'high'),
+    'S701': ('security', 'high'),
+    # Bandit medium: exec/eval, unsafe deserialization and XML parsing, SQL
+    # strings, weak hashes and cipher modes, insecure temp files and binds
+    'S102': ('security', 'medium'),
+    'S103': ('security', 'medium'),
+    'S104': ('security', 'medium'),
+    'S108': ('security', 'medium'),
+    'S113': ('security', 'medium'),
+    'S301': ('security', 'medium'),
+    'S302': ('security', 'medium'),
+    'S303': ('security', 'medium'),
+    'S305': ('security', 'medium'),
+    'S306': ('security', 'medium'),
+    'S307': ('security', 'medium'),
+    'S308': ('security', 'medium'),
+    'S310': ('security', 'medium'),
+    'S313': ('security', 'medium'),
+    'S314': ('security', 'medium'),
+    'S315': ('security', 'medium'),
+    'S316': ('security', 'medium'),
+    'S317': ('security', 'medium'),
+    'S318': ('security', 'medium'),
+    'S319': ('security', 'medium'),
+    'S320': ('security', 'medium'),
+    'S323': ('security', 'medium'),
+    'S503': ('security', 'medium'),
+    'S506': ('security', 'medium'),
+    'S508': ('security', 'medium'),
+    'S509': ('security', 'medium'),
+    'S601': ('security', 'medium'),
+    'S604': ('security', 'medium'),
+    'S608': ('security', 'medium'),
+    'S610': ('security', 'medium'),
+    'S611': ('security', 'medium'),
+    'S612': ('security', 'medium'),
+    'S702': ('security', 'medium'),
+    'S703': ('security', 'medium'),
+    'S704': ('security', 'medium'),
+    # Everything else Bandit rates low (asserts, hardcoded passwords,
+    # try/except/pass, random, subprocess imports and calls, ...)
+    'S': ('security', 'low'),
+    'PLE': ('quality', 'high'),
+    'PLW': ('quality', 'medium'),
+    'PLR': ('quality', 'low'),
+    'PLC': ('quality', 'low'),
+    'E': ('quality', 'low'),
+    'F': ('quality', 'medium')
+}
+
+# Returned by a scanner whose tool isn't installed: unlike a clean result it
+# must not score or cache the file, and unlike None it isn't a crash
+_TOOL_UNAVAILABLE = object()
+
+# Safety audits dependency manifests; on plain source it is a wasted subprocess
+_SAFETY_TARGETS = frozenset({'requirements.txt', 'pipfile.lock', 'poetry.lock'})
+
+# Languages without a wired-up analyzer -> (tool, message) reported in their place;
+# Python files are batched separately in _analyze_python_batch
+_STUB_ANALYSES = {
+    'javascript': ("ESLint", "JavaScript security analysis requires ESLint with security plugins"),
+    'java': ("SpotBugs", "Java security analysis requires SpotBugs or CheckMarx"),
+    'cpp': ("clang-tidy", "C++ security analysis requires clang-tidy with security checks"),
+}
+
+# Larger files (typically generated or minified) are skipped rather than analyzed
+_MAX_CODE_SIZE = 1_000_000
+
+# Batch scan timeout: a fixed allowance plus time per file and per byte scanned,
+# so a large batch isn't killed (and reported as failed) by a single-file budget
+_SCAN_TIMEOUT_BASE = 60
+_SCAN_TIMEOUT_PER_FILE = 1
+_SCAN_BYTES_PER_SECOND = 20_000
+
+# posix_fadvise is POSIX-only (absent on Windows and macOS)
+_HAS_FADVISE = hasattr(os, 'posix_fadvise')
+
+
+# Workers run as their own entry point so the caller's __main__ is never
+# re-imported; the project root goes on their path so `src` resolves from any cwd
+_WORKER_MODULE = 'src.tools._tool_worker'
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _ToolWorker:
+    """
+    Long-lived process that keeps one analysis tool imported between scans,
+    so each scan is a pipe round trip rather than a cold start.
+    """
+    
+    def __init__(self, tool: str):
+        self.tool = tool
+        self._lock = threading.Lock()
+        self._process = None
+    
+    def scan(self, file_paths: List[str], timeout: float = 60) -> List[Dict]:
+        """Run the tool over the given files in the worker process"""
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            
+            try:
+                self._process.stdin.write(json.dumps(list(file_paths)) + "\n")
+                self._process.stdin.flush()
+            except OSError:
+                self.stop()
+                raise RuntimeError(f"{self.tool} worker exited unexpectedly")
+            
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    line = self._replies.get(timeout=1)
+                except queue.Empty:
+                    if time.monotonic() >= deadline:
+                        # The worker is still busy with this scan; restart it so
+                        # the next request doesn't pick up a stale result
+                        self.stop()
+                        raise TimeoutError(f"{self.tool} timed out after {timeout} seconds")
+                    continue
+                
+                if line is None:
+                    # stdout closed: the worker died mid-scan
+                    self.stop()
+                    raise RuntimeError(f"{self.tool} worker exited unexpectedly")
+                ok, payload = json_loads(line)
+                break
+        
+        if not ok:
+            raise RuntimeError(f"{self.tool} failed: {payload}")
+        return payload
+    
+    def _start(self) -> None:
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, (_PROJECT_ROOT, env.get('PYTHONPATH'))))
+        self._process = subprocess.Popen(
+            [sys.executable, '-m', _WORKER_MODULE, self.tool],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            text=True,
+            encoding='utf-8',
+            bufsize=1
+        )
+        # Replies are read on a helper thread so scan() can wait with a timeout
+        self._replies = queue.Queue()
+        threading.Thread(
+            target=self._read_replies,
+            args=(self._process.stdout, self._replies),
+            daemon=True
+        ).start()
+    
+    @staticmethod
+    def _read_replies(stdout, replies: queue.Queue) -> None:
+        """Forward each reply line to the queue, then None once the worker exits"""
+        for line in stdout:
+            replies.put(line)
+        replies.put(None)
+    
+    def stop(self) -> None:
+        """Terminate the worker process"""
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+
+# One worker per tool so Bandit and Pylint still run side by side; started on
+# first use and shut down with the interpreter
+_TOOL_WORKERS = {tool: _ToolWorker(tool) for tool in ('bandit', 'pylint')}
+for _worker in _TOOL_WORKERS.values():
+    atexit.register(_worker.stop)
+
 
 class SecurityQualityAnalyzer:
     """
     Comprehensive security and quality analysis using multiple tools with custom evaluation.
     """
     
+    # Shared across instances: tool versions are probed once per process and
+    # per-file results, keyed by code hash and tool versions, persist on disk
+    _tool_versions: Optional[str] = None
+    _cache = ResultCache("sec_analyzer")
+    
     def __init__(self):
-        self.supported_languages = {
-            'python': self._analyze_python,
-            'javascript': self._analyze_javascript,
-            'java': self._analyze_java,
-            'cpp': self._analyze_cpp
+        # Probe tools once so a missing tool short-circuits instead of paying
+        # for a failed spawn or worker start on every call. Ruff and Safety run
+        # as executables (resolved to absolute paths); Bandit and Pylint are
+        # imported in the worker processes.
+        self._tools = {
+            'ruff': shutil.which('ruff'),
+            'safety': shutil.which('safety'),
+            'bandit': importlib.util.find_spec('bandit') is not None,
+            'pylint': importlib.util.find_spec('pylint') is not None
         }
+        
+        # Write batch files to RAM-backed tmpfs when available (Linux)
+        self._tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
     
     def analyze_security(self, state: Dict) -> Dict:
         """Perform comprehensive security and quality analysis"""
@@ -32,19 +277,16 @@ class SecurityQualityAnalyzer:
                 }
                 return state
             
-            security_results = []
-            for file in files:
-                file_analysis = self._analyze_single_file(file)
-                security_results.append(file_analysis)
+            security_results = self._run_analysis(files)
             
-            # Generate overall security assessment
-            overall_assessment = self._generate_overall_assessment(security_results)
+            # Generate overall security assessment, risks and quality issues in one pass
+            overall_assessment, security_risks, quality_issues = self._aggregate(security_results)
             
             state["security_analysis"] = {
                 "file_analyses": security_results,
                 "overall_assessment": overall_assessment,
-                "security_risks": self._identify_security_risks(security_results),
-                "quality_issues": self._identify_quality_issues(security_results)
+                "security_risks": security_risks,
+                "quality_issues": quality_issues
             }
             
             print("✅ Security analysis completed")
@@ -57,123 +299,242 @@ class SecurityQualityAnalyzer:
         
         return state
     
+    def _run_analysis(self, files: List[Dict]) -> List[Dict]:
+        """Run the async analysis from sync code - sync wrapper for async method"""
+        return run_sync(self._analyze_all(files))
+    
+    async def _analyze_all(self, files: List[Dict]) -> List[Dict]:
+        """Analyze all files, preserving input order"""
+        kinds = [self._file_kind(file) for file in files]
+        python_analyses, manifest_analyses = await asyncio.gather(
+            self._analyze_python_batch([file for file, kind in zip(files, kinds) if kind == 'python']),
+            self._analyze_manifests([file for file, kind in zip(files, kinds) if kind == 'manifest'])
+        )
+        batches = {'python': iter(python_analyses), 'manifest': iter(manifest_analyses)}
+        
+        return [
+            next(batches[kind]) if kind in batches else self._analyze_single_file(file)
+            for file, kind in zip(files, kinds)
+        ]
+    
+    def _file_kind(self, file: Dict) -> str:
+        """Route a file to the Python batch, the Safety manifest audit or the per-language stubs"""
+        if file.get("language") == "python":
+            return 'python'
+        if self._tools['safety'] is not None and self._is_safety_target(file.get("file_name")):
+            return 'manifest'
+        return 'other'
+    
     def _analyze_single_file(self, file: Dict) -> Dict:
-        """Analyze a single file for security and quality issues"""
+        """Analyze a single non-Python file for security and quality issues"""
         language = file.get("language", "unknown")
-        analyzer_func = self.supported_languages.get(language, self._analyze_generic)
+        stub = _STUB_ANALYSES.get(language)
+        if stub is None:
+            return self._analyze_generic(file)
         
-        return analyzer_func(file)
+        tool, message = stub
+        return {
+            "file_name": file.get("file_name"),
+            "language": language,
+            "tools_used": [],
+            "issues": [{
+                "tool": tool,
+                "type": "info",
+                "message": message,
+                "severity": "medium"
+            }],
+            "security_score": 0,
+            "quality_score": 0
+        }
     
-    def _analyze_python(self, file: Dict) -> Dict:
-        """Analyze Python file for security and quality"""
-        analysis = {
+    async def _analyze_manifests(self, files: List[Dict]) -> List[Dict]:
+        """Audit dependency manifests with Safety, one run per manifest"""
+        analyses = [{
             "file_name": file.get("file_name"),
-            "language": "python",
+            "language": file.get("language", "unknown"),
             "tools_used": [],
             "issues": [],
             "security_score": 0,
             "quality_score": 0
-        }
-        
-        code = file.get("code", "")
-        if not code.strip():
-            return analysis
+        } for file in files]
         
-        # Create temporary file for analysis
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as tmp:
-            tmp.write(code)
-            tmp_path = tmp.name
+        # Not cached: the verdict depends on Safety's advisory database, not just the file
+        to_audit = [(analysis, file.get("code", "")) for analysis, file in zip(analyses, files)
+                    if file.get("code", "").strip()]
+        results = await asyncio.gather(*(self._run_safety_async(code) for _, code in to_audit))
         
-        try:
-            # Run Bandit for security
-            bandit_result = self._run_bandit(tmp_path)
-            analysis["tools_used"].append("bandit")
-            analysis["issues"].extend(bandit_result.get("issues", []))
+        for (analysis, _), safety_data in zip(to_audit, results):
+            if safety_data is _TOOL_UNAVAILABLE:
+                analysis["issues"].append(self._tool_unavailable_issue(["safety"]))
+                continue
+            if safety_data is None:
+                analysis["issues"].append(self._scan_failed_issue(["safety"]))
+                continue
             
-            # Run Safety for vulnerability check
-            safety_result = self._run_safety(tmp_path)
             analysis["tools_used"].append("safety")
-            analysis["issues"].extend(safety_result.get("vulnerabilities", []))
-            
-            # Run Pylint for code quality
-            pylint_result = self._run_pylint(tmp_path)
-            analysis["tools_used"].append("pylint")
-            analysis["issues"].extend(pylint_result.get("quality_issues", []))
-            
-            # Calculate scores
+            analysis["issues"].extend(safety_data.get("vulnerabilities", []))
             analysis["security_score"] = self._calculate_security_score(analysis["issues"])
             analysis["quality_score"] = self._calculate_quality_score(analysis["issues"])
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
         
-        return analysis
+        return analyses
     
-    def _analyze_javascript(self, file: Dict) -> Dict:
-        """Analyze JavaScript file for security and quality"""
-        analysis = {
-            "file_name": file.get("file_name"),
-            "language": "javascript",
-            "tools_used": [],
-            "issues": [],
-            "security_score": 0,
-            "quality_score": 0
+    def _tool_unavailable_issue(self, missing_tools: List[str]) -> Dict:
+        """Build the info issue recorded when a scanner isn't installed"""
+        return {
+            "tool": "scan-guard",
+            "type": "info",
+            "message": f"Not scanned, tool not installed: {', '.join(missing_tools)}",
+            "severity": "info"
         }
-        
-        # JavaScript analysis implementation
-        # Similar pattern to Python analysis
-        analysis["issues"].append({
-            "tool": "ESLint",
+    
+    def _scan_failed_issue(self, failed_tools: List[str]) -> Dict:
+        """Build the info issue recorded when a scanner crashed or timed out"""
+        return {
+            "tool": "scan-guard",
             "type": "info",
-            "message": "JavaScript security analysis requires ESLint with security plugins",
-            "severity": "medium"
-        })
-        
-        return analysis
+            "message": f"Scan failed for: {', '.join(failed_tools)}",
+            "severity": "info"
+        }
     
-    def _analyze_java(self, file: Dict) -> Dict:
-        """Analyze Java file for security and quality"""
-        analysis = {
+    async def _analyze_python_batch(self, files: List[Dict]) -> List[Dict]:
+        """Analyze Python files with one Bandit and one Pylint run for the whole batch"""
+        analyses = [{
             "file_name": file.get("file_name"),
-            "language": "java",
+            "language": "python",
             "tools_used": [],
             "issues": [],
             "security_score": 0,
             "quality_score": 0
-        }
+        } for file in files]
         
-        # Java analysis implementation
-        analysis["issues"].append({
-            "tool": "SpotBugs",
-            "type": "info",
-            "message": "Java security analysis requires SpotBugs or CheckMarx",
-            "severity": "medium"
-        })
+        tool_versions = await self._get_tool_versions()
         
-        return analysis
-    
-    def _analyze_cpp(self, file: Dict) -> Dict:
-        """Analyze C++ file for security and quality"""
-        analysis = {
-            "file_name": file.get("file_name"),
-            "language": "cpp",
-            "tools_used": [],
-            "issues": [],
-            "security_score": 0,
-            "quality_score": 0
-        }
+        # Analysis is deterministic in (code, tool versions), so unchanged files
+        # are served from the cache without running any tool
+        to_scan = []
+        for analysis, file in zip(analyses, files):
+            code = file.get("code", "")
+            if not code.strip():
+                continue
+            
+            if len(code) > _MAX_CODE_SIZE:
+                analysis["tools_used"].append("size-guard")
+                analysis["issues"].append({
+                    "tool": "size-guard",
+                    "type": "info",
+                    "message": f"Skipped: file has {len(code)} characters, above the {_MAX_CODE_SIZE} limit",
+                    "severity": "info"
+                })
+                continue
+            
+            cache_key = hashlib.blake2b(
+                f"{_ANALYSIS_VERSION}\0{tool_versions}\0{code}".encode('utf-8'), digest_size=16
+            ).hexdigest()
+            cached = self._cache.load(cache_key)
+            if cached is not None:
+                cached["file_name"] = analysis["file_name"]
+                analysis.update(cached)
+            else:
+                to_scan.append((analysis, code, cache_key))
         
-        # C++ analysis implementation
-        analysis["issues"].append({
-            "tool": "clang-tidy",
-            "type": "info",
-            "message": "C++ security analysis requires clang-tidy with security checks",
-            "severity": "medium"
-        })
+        if not to_scan:
+            return analyses
         
-        return analysis
+        # One subdirectory per file keeps the original basenames (and so Pylint's
+        # module names) intact even when two files share a name
+        tmp_dir = tempfile.mkdtemp(prefix="security_analysis_", dir=self._tmp_dir)
+        try:
+            paths = []
+            for index, (analysis, code, _) in enumerate(to_scan):
+                file_dir = os.path.join(tmp_dir, str(index))
+                os.mkdir(file_dir)
+                file_path = os.path.join(file_dir, os.path.basename(analysis["file_name"] or "main.py"))
+                with open(file_path, 'w', encoding='utf-8') as tmp:
+                    tmp.write(code)
+                    if _HAS_FADVISE:
+                        # Every scanner reads this file; ask the kernel to keep it cached
+                        tmp.flush()
+                        os.posix_fadvise(tmp.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                paths.append(file_path)
+            
+            timeout = self._scan_timeout(len(paths), sum(len(code) for _, code, _ in to_scan))
+            if self._tools['ruff'] is not None:
+                # One Rust process covers Bandit's S rules and a large Pylint subset
+                scans = {'ruff': self._run_ruff_async(paths, timeout)}
+            else:
+                # Bandit for security, Pylint for code quality
+                scans = {
+                    'bandit': self._run_bandit_async(paths, timeout),
+                    'pylint': self._run_pylint_async(paths, timeout)
+                }
+            
+            issues_by_tool = dict(zip(scans, await asyncio.gather(*scans.values())))
+            
+            for (analysis, _, cache_key), path in zip(to_scan, paths):
+                missing_tools = []
+                failed_tools = []
+                for tool, issues_by_path in issues_by_tool.items():
+                    if issues_by_path is _TOOL_UNAVAILABLE:
+                        missing_tools.append(tool)
+                    elif issues_by_path is None:
+                        failed_tools.append(tool)
+                    else:
+                        analysis["tools_used"].append(tool)
+                        analysis["issues"].extend(issues_by_path.get(path, []))
+                
+                if missing_tools:
+                    analysis["issues"].append(self._tool_unavailable_issue(missing_tools))
+                if failed_tools:
+                    analysis["issues"].append(self._scan_failed_issue(failed_tools))
+                if missing_tools or failed_tools:
+                    # A scan that crashed, timed out or never ran found nothing, which is
+                    # not the same as clean code: leave the scores at 0 and don't cache
+                    continue
+                
+                # Calculate scores
+                analysis["security_score"] = self._calculate_security_score(analysis["issues"])
+                analysis["quality_score"] = self._calculate_quality_score(analysis["issues"])
+                
+                self._cache.store(cache_key, analysis)
+            
+        finally:
+            # Clean up temporary files
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        return analyses
+    
+    def _scan_timeout(self, file_count: int, total_size: int) -> float:
+        """Timeout for one scan over a batch, scaled by file count and size"""
+        return _SCAN_TIMEOUT_BASE + _SCAN_TIMEOUT_PER_FILE * file_count + total_size / _SCAN_BYTES_PER_SECOND
+    
+    def _is_safety_target(self, file_name: Optional[str]) -> bool:
+        """Check whether a file looks like a dependency manifest Safety can audit"""
+        base_name = os.path.basename(file_name or '').lower()
+        # requirements*.txt only: requirements_validator.py is source, not a manifest
+        return base_name in _SAFETY_TARGETS or (base_name.startswith('requirements') and base_name.endswith('.txt'))
+    
+    async def _get_tool_versions(self) -> str:
+        """Get the combined Ruff/Bandit/Pylint version string, probed once per process"""
+        if SecurityQualityAnalyzer._tool_versions is None:
+            versions = []
+            for tool in ('bandit', 'pylint'):
+                try:
+                    versions.append(f"{tool}={importlib.metadata.version(tool)}")
+                except importlib.metadata.PackageNotFoundError:
+                    versions.append(f"{tool}=unavailable")
+            
+            # Ruff is a standalone binary, so ask it rather than the package metadata
+            ruff_version = "unavailable"
+            if self._tools['ruff'] is not None:
+                try:
+                    _, stdout = await self._exec_tool(self._tools['ruff'], '--version')
+                    ruff_version = stdout.strip()
+                except Exception:
+                    pass
+            versions.append(f"ruff={ruff_version}")
+            SecurityQualityAnalyzer._tool_versions = "|".join(versions)
+        
+        return SecurityQualityAnalyzer._tool_versions
     
     def _analyze_generic(self, file: Dict) -> Dict:
         """Generic analysis for unsupported languages"""
@@ -191,46 +552,60 @@ class SecurityQualityAnalyzer:
             "quality_score": 0
         }
     
-    def _run_bandit(self, file_path: str) -> Dict:
-        """Run Bandit security analysis"""
+    async def _exec_tool(self, *command: str, input: Optional[str] = None, timeout: float = 60) -> Tuple[int, str]:
+        """Run a tool subprocess without blocking the event loop, optionally piping input to stdin"""
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
         try:
-            result = subprocess.run(
-                ['bandit', '-f', 'json', '-r', file_path],
-                capture_output=True, text=True, timeout=60
-            )
-            
-            if result.returncode == 0:
-                try:
-                    bandit_data = json.loads(result.stdout)
-                    issues = []
-                    for result_item in bandit_data.get('results', []):
-                        issues.append({
-                            "tool": "Bandit",
-                            "type": "security",
-                            "message": f"{result_item.get('issue_text', 'Unknown issue')}",
-                            "severity": result_item.get('issue_severity', 'low'),
-                            "confidence": result_item.get('issue_confidence', 'low'),
-                            "line": result_item.get('line_number')
-                        })
-                    return {"issues": issues}
-                except:
-                    pass
+            stdin_data = input.encode('utf-8') if input is not None else None
+            stdout, _ = await asyncio.wait_for(proc.communicate(stdin_data), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        
+        return proc.returncode, stdout.decode('utf-8', errors='replace')
+    
+    async def _run_bandit_async(self, file_paths: List[str], timeout: float = 60) -> Optional[Dict[str, List[Dict]]]:
+        """Run Bandit security analysis once over all files, grouped by file path (None if the run failed)"""
+        if not self._tools['bandit']:
+            return _TOOL_UNAVAILABLE
+        
+        try:
+            # Served by the warm worker process: no interpreter start-up or JSON round trip
+            bandit_results = await asyncio.to_thread(_TOOL_WORKERS['bandit'].scan, file_paths, timeout)
+            issues = {}
+            for result_item in bandit_results:
+                path = os.path.abspath(result_item.get('filename', ''))
+                issues.setdefault(path, []).append({
+                    "tool": "Bandit",
+                    "type": "security",
+                    "message": f"{result_item.get('issue_text', 'Unknown issue')}",
+                    "severity": result_item.get('issue_severity', 'low').lower(),
+                    "confidence": result_item.get('issue_confidence', 'low').lower(),
+                    "line": result_item.get('line_number')
+                })
+            return issues
         except:
             pass
         
-        return {"issues": []}
+        return None
     
-    def _run_safety(self, file_path: str) -> Dict:
-        """Run Safety vulnerability check"""
+    async def _run_safety_async(self, code: str) -> Optional[Dict]:
+        """Run Safety vulnerability check, piping the code through stdin"""
+        if self._tools['safety'] is None:
+            return _TOOL_UNAVAILABLE
+        
         try:
-            result = subprocess.run(
-                ['safety', 'check', '--json', '--file', file_path],
-                capture_output=True, text=True, timeout=60
-            )
+            returncode, stdout = await self._exec_tool(self._tools['safety'], 'check', '--json', '--stdin', input=code)
             
-            if result.returncode in [0, 1]:  # Safety returns 1 when vulnerabilities found
+            if returncode in [0, 1]:  # Safety returns 1 when vulnerabilities found
                 try:
-                    safety_data = json.loads(result.stdout)
+                    safety_data = json_loads(stdout)
                     vulnerabilities = []
                     for vuln in safety_data.get('vulnerabilities', []):
                         vulnerabilities.append({
@@ -246,34 +621,67 @@ class SecurityQualityAnalyzer:
         except:
             pass
         
-        return {"vulnerabilities": []}
+        return None
     
-    def _run_pylint(self, file_path: str) -> Dict:
-        """Run Pylint for code quality"""
+    async def _run_ruff_async(self, file_paths: List[str], timeout: float = 60) -> Optional[Dict[str, List[Dict]]]:
+        """Run Ruff's security and Pylint rules once over all files, grouped by file path"""
         try:
-            result = subprocess.run(
-                ['pylint', '--output-format=json', file_path],
-                capture_output=True, text=True, timeout=60
+            _, stdout = await self._exec_tool(
+                self._tools['ruff'], 'check',
+                '--select', 'S,PL,E,F',
+                '--output-format', 'json',
+                '--isolated', '--no-cache', '--exit-zero',
+                *file_paths,
+                timeout=timeout
             )
             
             try:
-                pylint_data = json.loads(result.stdout)
-                quality_issues = []
-                for issue in pylint_data:
-                    quality_issues.append({
-                        "tool": "Pylint",
-                        "type": "quality",
-                        "message": f"{issue.get('message', 'Unknown issue')} ({issue.get('symbol', 'unknown')})",
-                        "severity": self._map_pylint_severity(issue.get('type', 'info')),
-                        "line": issue.get('line')
+                ruff_data = json_loads(stdout)
+                issues = {}
+                for item in ruff_data:
+                    code = item.get('code') or ''
+                    # Exact rule first, then its prefix group
+                    issue_type, severity = _RUFF_RULE_MAP.get(code) or _RUFF_RULE_MAP.get(
+                        code[:3], _RUFF_RULE_MAP.get(code[:1], ('quality', 'low'))
+                    )
+                    path = os.path.abspath(item.get('filename', ''))
+                    issues.setdefault(path, []).append({
+                        "tool": "Ruff",
+                        "type": issue_type,
+                        "message": f"{item.get('message', 'Unknown issue')} ({code})",
+                        "severity": severity,
+                        "line": (item.get('location') or {}).get('row')
                     })
-                return {"quality_issues": quality_issues}
+                return issues
             except:
                 pass
         except:
             pass
         
-        return {"quality_issues": []}
+        return None
+    
+    async def _run_pylint_async(self, file_paths: List[str], timeout: float = 60) -> Optional[Dict[str, List[Dict]]]:
+        """Run Pylint once over all files for code quality, grouped by file path (None if the run failed)"""
+        if not self._tools['pylint']:
+            return _TOOL_UNAVAILABLE
+        
+        try:
+            pylint_data = await asyncio.to_thread(_TOOL_WORKERS['pylint'].scan, file_paths, timeout)
+            quality_issues = {}
+            for issue in pylint_data:
+                path = os.path.abspath(issue.get('path', ''))
+                quality_issues.setdefault(path, []).append({
+                    "tool": "Pylint",
+                    "type": "quality",
+                    "message": f"{issue.get('message', 'Unknown issue')} ({issue.get('symbol', 'unknown')})",
+                    "severity": self._map_pylint_severity(issue.get('type', 'info')),
+                    "line": issue.get('line')
+                })
+            return quality_issues
+        except:
+            pass
+        
+        return None
     
     def _map_pylint_severity(self, pylint_type: str) -> str:
         """Map Pylint message type to severity"""
@@ -288,22 +696,8 @@ class SecurityQualityAnalyzer:
     
     def _calculate_security_score(self, issues: List[Dict]) -> float:
         """Calculate security score based on issues"""
-        if not issues:
-            return 10.0
-        
-        severity_weights = {
-            'critical': 5,
-            'high': 4,
-            'medium': 3,
-            'low': 1,
-            'info': 0
-        }
-        
-        total_weight = 0
-        for issue in issues:
-            if issue.get('type') == 'security' or issue.get('type') == 'vulnerability':
-                severity = issue.get('severity', 'low')
-                total_weight += severity_weights.get(severity, 1)
+        total_weight = sum(_SEV_W.get(issue.get('severity', 'low'), 1)
+                           for issue in issues if issue.get('type') in _SEC_TYPES)
         
         # Convert to score out of 10 (higher is better)
         base_score = 10.0
@@ -312,11 +706,7 @@ class SecurityQualityAnalyzer:
     
     def _calculate_quality_score(self, issues: List[Dict]) -> float:
         """Calculate quality score based on issues"""
-        if not issues:
-            return 10.0
-        
-        quality_issue_count = sum(1 for issue in issues 
-                                if issue.get('type') in ['quality', 'maintainability'])
+        quality_issue_count = sum(1 for issue in issues if issue.get('type') in _QUAL_TYPES)
         
         # Convert to score out of 10
         base_score = 10.0
@@ -325,81 +715,73 @@ class SecurityQualityAnalyzer:
     
     def _generate_overall_assessment(self, analyses: List[Dict]) -> Dict:
         """Generate overall security and quality assessment"""
+        return self._aggregate(analyses)[0]
+    
+    def _aggregate(self, analyses: List[Dict]) -> Tuple[Dict, List[str], List[str]]:
+        """Build the overall assessment, security risks and quality issues in a single pass"""
         if not analyses:
-            return {"security_rating": "UNKNOWN", "quality_rating": "UNKNOWN"}
+            return {"security_rating": "UNKNOWN", "quality_rating": "UNKNOWN"}, [], []
         
-        avg_security = sum(analysis.get("security_score", 0) for analysis in analyses) / len(analyses)
-        avg_quality = sum(analysis.get("quality_score", 0) for analysis in analyses) / len(analyses)
+        security_total = 0
+        quality_total = 0
+        total_issues = 0
+        risks = {}  # Ordered sets: dedupe while keeping report order
+        quality_issues = {}
         
-        return {
+        for analysis in analyses:
+            security_total += analysis.get("security_score", 0)
+            quality_total += analysis.get("quality_score", 0)
+            issues = analysis.get("issues", [])
+            total_issues += len(issues)
+            
+            for issue in issues:
+                issue_type = issue.get('type')
+                if issue_type in _SEC_TYPES:
+                    if issue.get('severity', 'low') in _RISK_SEVERITIES:
+                        risks[f"{analysis['file_name']}: {issue['message']}"] = None
+                elif issue_type == 'quality' and issue.get('severity') in _QUAL_REPORT_SEVERITIES:
+                    quality_issues[f"{analysis['file_name']}: {issue['message']}"] = None
+        
+        avg_security = security_total / len(analyses)
+        avg_quality = quality_total / len(analyses)
+        
+        overall_assessment = {
             "average_security_score": round(avg_security, 2),
             "average_quality_score": round(avg_quality, 2),
             "security_rating": self._rate_security(avg_security),
             "quality_rating": self._rate_quality(avg_quality),
-            "total_issues": sum(len(analysis.get("issues", [])) for analysis in analyses),
+            "total_issues": total_issues,
             "files_analyzed": len(analyses)
         }
+        
+        return overall_assessment, list(risks), list(quality_issues)
     
     def _rate_security(self, score: float) -> str:
         """Rate security based on score"""
-        if score >= 9.0:
-            return "EXCELLENT"
-        elif score >= 7.0:
-            return "GOOD"
-        elif score >= 5.0:
-            return "FAIR"
-        elif score >= 3.0:
-            return "POOR"
-        else:
-            return "CRITICAL"
+        return _SEC_LABELS[bisect.bisect_right(_RATING_THRESH, score)]
     
     def _rate_quality(self, score: float) -> str:
         """Rate quality based on score"""
-        if score >= 9.0:
-            return "EXCELLENT"
-        elif score >= 7.0:
-            return "GOOD"
-        elif score >= 5.0:
-            return "FAIR"
-        elif score >= 3.0:
-            return "POOR"
-        else:
-            return "VERY_POOR"
+        return _QUAL_LABELS[bisect.bisect_right(_RATING_THRESH, score)]
     
     def _identify_security_risks(self, analyses: List[Dict]) -> List[str]:
         """Identify critical security risks"""
-        risks = []
-        
-        for analysis in analyses:
-            for issue in analysis.get("issues", []):
-                if issue.get('type') in ['security', 'vulnerability']:
-                    severity = issue.get('severity', 'low')
-                    if severity in ['critical', 'high']:
-                        risk_msg = f"{analysis['file_name']}: {issue['message']}"
-                        risks.append(risk_msg)
-        
-        return list(set(risks))  # Remove duplicates
+        return self._aggregate(analyses)[1]
     
     def _identify_quality_issues(self, analyses: List[Dict]) -> List[str]:
         """Identify significant quality issues"""
-        issues = []
-        
-        for analysis in analyses:
-            for issue in analysis.get("issues", []):
-                if issue.get('type') == 'quality' and issue.get('severity') in ['high', 'medium']:
-                    issue_msg = f"{analysis['file_name']}: {issue['message']}"
-                    issues.append(issue_msg)
-        
-        return list(set(issues))
+        return self._aggregate(analyses)[2]
     
-    def get_tool(self) -> Tool:
+    def get_tool(self):
         """Convert to LangChain Tool"""
+        from langchain.agents import Tool
+        
         return Tool(
             name="Security & Quality Analyzer",
             func=self.analyze_security,
             description="""
 Performs comprehensive security and quality analysis using multiple tools.
-Uses Bandit, Safety, Pylint and language-specific analyzers.
+Uses Ruff (or Bandit and Pylint), Safety and language-specific analyzers.
 Output: Security scores, quality assessment, and identified risks.
             """
         )
\ No newline at end of file
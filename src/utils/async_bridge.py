@@ -0,0 +1,34 @@
+# async_bridge.py
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+# One event loop, running in a daemon thread for the life of the process. Every
+# sync-to-async call runs on it, so HTTP connection pools stay bound to a live
+# loop and warm across calls, and no thread or loop is built per call.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background event loop, starting it on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-bridge-loop", daemon=True).start()
+    return _loop
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """Run a coroutine on the background loop from sync code and wait for its result"""
+    loop = get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        # Blocking the loop on its own future would never return
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the background loop; await the coroutine instead")
+    
+    # Works the same whether or not the caller already has a running loop
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
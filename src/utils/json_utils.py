@@ -0,0 +1,9 @@
+# json_utils.py
+import json
+
+# orjson's C parser when installed; a drop-in for json.loads on str and bytes input
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
@@ -1,12 +1,48 @@
 import os
+import asyncio
+import weakref
+import importlib.util
+import httpx
 from langchain_openai import ChatOpenAI
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+from langchain_core.callbacks import StreamingStdOutCallbackHandler
 from threading import Lock
 from dotenv import load_dotenv
 from typing import Optional, List, Any, Dict
 
 load_dotenv('./env/.env.local')
 
+# Read once, after the .env file is loaded; a missing key is reported when an
+# LLM is first requested, so importing this module never fails
+_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# One connection pool shared by every ChatOpenAI instance. With h2 installed,
+# concurrent requests are multiplexed over a single HTTP/2 TLS connection
+# instead of each opening its own. Timeouts match the OpenAI SDK defaults.
+_HTTP_OPTIONS = {
+    "http2": importlib.util.find_spec("h2") is not None,
+    "timeout": httpx.Timeout(600.0, connect=5.0),
+    "limits": httpx.Limits(max_connections=32, max_keepalive_connections=16),
+}
+_SHARED_HTTP_CLIENT = httpx.Client(**_HTTP_OPTIONS)
+
+# An AsyncClient's pool is bound to the event loop that first used it, so async
+# clients are kept per loop and dropped along with their loop
+_ASYNC_HTTP_CLIENTS = weakref.WeakKeyDictionary()
+_async_clients_lock = Lock()
+
+def _get_async_http_client() -> Optional[httpx.AsyncClient]:
+    """Return the async connection pool for the running event loop, or None outside one"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    
+    with _async_clients_lock:
+        client = _ASYNC_HTTP_CLIENTS.get(loop)
+        if client is None:
+            client = _ASYNC_HTTP_CLIENTS[loop] = httpx.AsyncClient(**_HTTP_OPTIONS)
+    return client
+
 class StreamingCallbackHandler(StreamingStdOutCallbackHandler):
     """
     Custom streaming callback handler with enhanced functionality.
@@ -27,7 +63,6 @@ class OpenAILLM:
     """
     Singleton class to manage ChatOpenAI instances with async streaming support.
     """
-    _instance = None
     _lock = Lock()
     _llm_instances = {}
 
@@ -37,22 +72,19 @@ class OpenAILLM:
         if config_key not in cls._llm_instances:
             with cls._lock:
                 if config_key not in cls._llm_instances:
-                    api_key = os.getenv("OPENAI_API_KEY")
-                    if not api_key:
+                    if not _API_KEY:
                         raise ValueError("OPENAI_API_KEY is not set in environment variables")
 
                     instance = super(OpenAILLM, cls).__new__(cls)
+                    instance._loop_llms = weakref.WeakKeyDictionary()
                     
-                    # Set up callbacks for streaming
-                    final_callbacks = callbacks
-                    if streaming and final_callbacks is None:
-                        final_callbacks = [StreamingCallbackHandler()]
-                    elif streaming and final_callbacks is not None:
-                        has_streaming_callback = any(
-                            isinstance(cb, StreamingStdOutCallbackHandler) for cb in final_callbacks
-                        )
-                        if not has_streaming_callback:
-                            final_callbacks.append(StreamingCallbackHandler())
+                    # Set up callbacks for streaming; copy rather than append so the
+                    # caller's list (and so this instance's cache key) never changes
+                    final_callbacks = list(callbacks) if callbacks is not None else []
+                    if streaming and not any(
+                        isinstance(cb, StreamingStdOutCallbackHandler) for cb in final_callbacks
+                    ):
+                        final_callbacks.append(StreamingCallbackHandler())
                     
                     # Initialize the LLM
                     instance.llm = ChatOpenAI(
@@ -60,7 +92,8 @@ class OpenAILLM:
                         temperature=temperature,
                         streaming=streaming,
                         callbacks=final_callbacks,
-                        api_key=api_key
+                        api_key=_API_KEY,
+                        http_client=_SHARED_HTTP_CLIENT
                     )
                     
                     instance.config = {
@@ -75,7 +108,7 @@ class OpenAILLM:
         return cls._llm_instances[config_key]
 
     def get_llm(self, streaming: Optional[bool] = None, callbacks: Optional[List] = None) -> ChatOpenAI:
-        """Get LLM instance with optional overrides"""
+        """Get LLM instance with optional overrides, bound to the running event loop if any"""
         if streaming is not None or callbacks is not None:
             config = self.config.copy()
             if streaming is not None:
@@ -85,29 +118,21 @@ class OpenAILLM:
             
             return self._create_llm_instance(**config)
         
-        return self.llm
-
-    def get_streaming_llm(self, callbacks: Optional[List] = None) -> ChatOpenAI:
-        """Get streaming-configured LLM instance"""
-        if callbacks is None:
-            callbacks = [StreamingCallbackHandler()]
-        else:
-            has_streaming_callback = any(
-                isinstance(cb, StreamingStdOutCallbackHandler) for cb in callbacks
-            )
-            if not has_streaming_callback:
-                callbacks.append(StreamingCallbackHandler())
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.llm
         
-        return self.get_llm(streaming=True, callbacks=callbacks)
-
-    def get_non_streaming_llm(self) -> ChatOpenAI:
-        """Get non-streaming LLM instance"""
-        return self.get_llm(streaming=False, callbacks=[])
+        # Async calls must go through the running loop's own connection pool
+        with self._lock:
+            llm = self._loop_llms.get(loop)
+            if llm is None:
+                llm = self._loop_llms[loop] = self._create_llm_instance(**self.config)
+        return llm
 
     def _create_llm_instance(self, model_name: str, temperature: float, streaming: bool, callbacks: List) -> ChatOpenAI:
         """Create new LLM instance"""
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        if not _API_KEY:
             raise ValueError("OPENAI_API_KEY is not set in environment variables")
         
         return ChatOpenAI(
@@ -115,5 +140,7 @@ class OpenAILLM:
             temperature=temperature,
             streaming=streaming,
             callbacks=callbacks,
-            api_key=api_key
+            api_key=_API_KEY,
+            http_client=_SHARED_HTTP_CLIENT,
+            http_async_client=_get_async_http_client()
         )
\ No newline at end of file
@@ -0,0 +1,124 @@
+# result_cache.py
+import os
+import copy
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+from src.utils.json_utils import json_loads
+
+# How long a cached tool or LLM result stays valid, in seconds; shared by every
+# cache so re-runs within the hour are free and stale verdicts age out
+CACHE_TTL = 3600
+
+# Most results a cache keeps in memory; the oldest are dropped past this
+CACHE_MAX_ENTRIES = 1024
+
+
+class ResultCache:
+    """
+    Results keyed by content hash, memoized in memory in front of an optional
+    directory of JSON files, all expiring after the same TTL. Expired results
+    are swept on store, and memory holds at most max_entries of them.
+    """
+    
+    def __init__(self, name: Optional[str] = None, ttl: float = CACHE_TTL,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        # name selects ~/.cache/<name>; without one, results are kept in memory only
+        self.cache_dir = os.path.join(os.path.expanduser("~"), ".cache", name) if name else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Oldest stored first, so expired and overflow entries sit at the front
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._next_file_sweep = 0.0
+    
+    def load(self, key: str) -> Optional[Any]:
+        """Return a copy of a fresh cached result, evicting it once expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load_file(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] <= self.ttl:
+                self._remember(key, entry)
+        
+        stored_at, value = entry
+        if time.time() - stored_at > self.ttl:
+            self._evict(key)
+            return None
+        
+        # Callers add to the result, so never hand out the cached object
+        return copy.deepcopy(value)
+    
+    def store(self, key: str, value: Any) -> None:
+        """Remember a result in memory and, for a named cache, on disk"""
+        now = time.time()
+        self._entries.pop(key, None)
+        self._remember(key, (now, copy.deepcopy(value)))
+        self._sweep(now)
+        if self.cache_dir is None:
+            return
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._path(key), 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+        except OSError:
+            pass
+    
+    def _remember(self, key: str, entry: Tuple[float, Any]) -> None:
+        """Keep an entry in memory, dropping the oldest once over max_entries"""
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _sweep(self, now: float) -> None:
+        """Drop expired results from memory and, at most once per TTL, from disk"""
+        while self._entries:
+            stored_at, _ = next(iter(self._entries.values()))
+            if now - stored_at <= self.ttl:
+                break
+            self._entries.popitem(last=False)
+        
+        if self.cache_dir is None or now < self._next_file_sweep:
+            return
+        
+        self._next_file_sweep = now + self.ttl
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                paths = [entry.path for entry in entries if entry.name.endswith('.json')]
+        except OSError:
+            return
+        
+        for path in paths:
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+            except OSError:
+                pass
+    
+    def _load_file(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Read a result from disk, dated by the file's modification time"""
+        if self.cache_dir is None:
+            return None
+        
+        path = self._path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                return stored_at, json_loads(f.read())
+        except (OSError, ValueError):
+            return None
+    
+    def _evict(self, key: str) -> None:
+        """Drop an expired result from memory and disk"""
+        self._entries.pop(key, None)
+        if self.cache_dir is not None:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+    
+    def _path(self, key: str) -> str:
+        """Get the JSON file holding a result"""
+        return os.path.join(self.cache_dir, f"{key}.json")
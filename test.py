@@ -3,6 +3,14 @@ import sys
 import os
 import json
 
+try:
+    import orjson
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str).decode('utf-8')
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, indent=2, default=str)
+
 # Add the src directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 from dotenv import load_dotenv
@@ -52,7 +60,7 @@ class Calculator:
         
         print("✅ DeepEvaluator completed successfully!")
         print("\n📊 RESULTS:")
-        print(json.dumps(result, indent=2, default=str))
+        print(_dumps(result))
         
         # Print summary
         if "deep_evaluation" in result: